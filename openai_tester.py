@@ -5,34 +5,201 @@ OpenAI 公益站检测工具
 用于测试 OpenAI 兼容接口的各种功能
 """
 
-import json
 import time
 import sys
-from typing import Optional, Dict, Any, List
+import threading
+import os
+import functools
+from dataclasses import dataclass, asdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, Any, List, Callable, Iterator, Literal, Tuple, Union
 
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     print("请先安装 requests: pip install requests")
     sys.exit(1)
 
+# 可选: 使用 orjson 加速 JSON 编解码 (可直接处理 bytes)，未安装时回退到标准库
 try:
-    from rich.console import Console
+    import orjson as _json
+    json_dumps = _json.dumps
+except ImportError:
+    import json as _json
+
+    def json_dumps(obj: Any) -> bytes:
+        return _json.dumps(obj, ensure_ascii=False).encode("utf-8")
+json_loads = _json.loads
+
+# 可选: 使用 ijson 流式解析大型模型列表，只提取模型 ID
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    from rich.console import Console, Group
+    from rich.text import Text
     from rich.table import Table
     from rich.panel import Panel
-    from rich.progress import Progress, SpinnerColumn, TextColumn
-    from rich import print as rprint
 except ImportError:
     print("请先安装 rich: pip install rich")
     sys.exit(1)
 
-console = Console()
+
+class _TokenEcho:
+    """流式内容回显缓冲
+
+    攒够一批 token 或距上次输出超过一定间隔才写一次终端，
+    绕过 Rich 的逐次渲染，避免回显拖慢接收循环、干扰计时。
+    """
+
+    def __init__(self, file, color: bool, max_pending: int = 16, interval: float = 0.05):
+        self._file = file
+        self._prefix, self._suffix = ("\x1b[36m", "\x1b[0m") if color else ("", "")
+        self._max_pending = max_pending
+        self._interval = interval
+        self._pending: List[str] = []
+        self._last_flush = time.perf_counter()
+
+    def add(self, text: str, now: float) -> None:
+        self._pending.append(text)
+        if len(self._pending) >= self._max_pending or now - self._last_flush >= self._interval:
+            self.flush()
+            self._last_flush = now
+
+    def flush(self) -> None:
+        if self._pending:
+            self._file.write(f"{self._prefix}{''.join(self._pending)}{self._suffix}")
+            self._file.flush()
+            self._pending.clear()
+
+
+class _Console(Console):
+    """增加 write_plain() 的控制台: 无样式的纯文本直接写到输出流，不经过 Rich 的渲染流程"""
+
+    def write_plain(self, text: str) -> None:
+        self.file.write(text)
+
+
+# 输出内容都是普通中文/emoji 文本，关闭自动高亮和 :emoji: 代码替换
+console = _Console(highlight=False, markup=True, emoji=False)
+
+# SSE 流结束标记
+_SSE_DONE = object()
+
+# SSE 数据行前缀与结束数据 (直接与原始字节比较，不解码)
+_SSE_DATA_PREFIX = b"data:"
+_SSE_DONE_PAYLOAD = b"[DONE]"
+
+# 模型列表响应超过该大小 (字节) 时使用 ijson 流式解析
+_MODELS_STREAM_PARSE_THRESHOLD = 64 * 1024
+
+# 模型选择菜单每页显示的模型数
+_MODEL_PAGE_SIZE = 30
+
+# 模型名中包含这些关键字时归类为对话模型
+_CHAT_KEYWORDS = ("gpt", "claude", "llama", "qwen", "glm", "chat")
+
+# 需要单独区分的 HTTP 错误状态码，其余记为 "http"
+_HTTP_ERROR_TYPES = {401: "auth", 403: "auth", 404: "not_found", 429: "rate_limit"}
+
+# 对话测试因这些原因失败时，流式和工具调用测试必然同样失败，不再发起请求
+_SKIP_AFTER_CHAT_ERRORS = frozenset({"auth", "not_found", "rate_limit"})
+_SKIPPED_AFTER_CHAT = {"success": False, "skipped": True, "reason": "chat_failed"}
+
+# 缺省结果的共享空字典 (只读，避免每次查找都新建 {})
+_EMPTY: Dict[str, Any] = {}
+
+# 流式质量描述映射
+_STREAM_QUALITY_DESC = {
+    "excellent": "真正流式",
+    "good": "流式支持",
+    "poor": "伪流式",
+    "non-standard": "非标准格式",
+    "not_supported": "不支持",
+    "unknown": "未知"
+}
+
+# 对比报告中各状态单元格的预渲染标记文本 (报告列较窄，非标准格式简写为"非标准")
+_OK = "[green]✅[/green]"
+_FAIL = "[red]❌[/red]"
+_TOOL_OK = "[green]✅ 支持[/green]"
+_TOOL_UNCALLED = "[yellow]⚠️ 未调用[/yellow]"
+_STREAM_CELL = {
+    q: f"{_OK} {text}"
+    for q, text in {**_STREAM_QUALITY_DESC, "non-standard": "非标准"}.items()
+}
+_STREAM_CELL_FAIL = _FAIL
+
+# 静态的标题面板、输入提示和分隔行只构建一次，循环测试时重复输出不再重新解析标记
+_WELCOME_PANEL = Panel.fit(
+    "[bold blue]🔍 OpenAI 公益站检测工具[/bold blue]\n"
+    "[dim]测试 OpenAI 兼容接口的各种功能[/dim]",
+    border_style="blue"
+)
+_URL_PROMPT = Text.assemble(("API Base URL", "cyan"), " (如 https://api.openai.com/v1): ")
+_KEY_PROMPT = Text.assemble(("API Key", "cyan"), ": ")
+_MODEL_PROMPT = Text("请输入选择 (序号或模型名): ", style="bold")
+_MODEL_LIST_TITLE = Text("📋 返回模型列表", style="bold cyan")
+
+# 纯 ASCII 分隔线不需要样式，直接写到输出流
+_SEP_STR = "=" * 50 + "\n"
+
+
+def _short(text: str, width: int = 30) -> str:
+    """截断过长的文本，超出部分用省略号代替"""
+    return text if len(text) <= width else f"{text[:width]}..."
+
+
+@functools.lru_cache(maxsize=4)
+def _header_panel(base_url: str) -> Panel:
+    """测试开始时的标题面板 (按 API 地址缓存)"""
+    return Panel.fit(
+        "[bold]OpenAI 公益站检测工具[/bold]\n"
+        f"[dim]API 地址: {base_url}[/dim]",
+        border_style="blue"
+    )
+
+
+# Python 3.10+ 的 dataclass 支持 slots，记录较多时更省内存、属性访问更快
+_DATACLASS_SLOTS = {"slots": True} if sys.version_info >= (3, 10) else {}
+
+
+@dataclass(**_DATACLASS_SLOTS)
+class TestRecord:
+    """单个模型的测试历史记录 (只保留对比报告需要的字段)"""
+    model: str
+    chat_success: bool = False
+    stream_success: bool = False
+    stream_quality: str = "unknown"
+    tool_success: bool = False
+    tool_called: bool = False
 
 
 class OpenAITester:
     """OpenAI 接口测试器"""
     
-    def __init__(self, base_url: str, api_key: str):
+    def __init__(self, base_url: str, api_key: str, pool_connections: int = 4,
+                 pool_maxsize: int = 16, keepalive: float = 30, connect_timeout: float = 10,
+                 results_log: Optional[str] = None, resume: bool = False):
+        """
+        Args:
+            base_url: API 基础地址
+            api_key: API 密钥
+            pool_connections: 连接池缓存的主机数
+            pool_maxsize: 每个主机保持的最大连接数，需覆盖并发测试的请求数
+            keepalive: 空闲连接的保留时间 (秒)，超过后丢弃，下次请求重新建连
+            connect_timeout: 建立连接的超时时间 (秒)，与各请求的读取超时分开计算；
+                连接失败不重试，地址不可达时每个请求最多等待这么久
+            results_log: 测试历史的 JSONL 文件路径，每测完一个模型追加一行；为 None 时不写文件
+            resume: 启动时先从 results_log 载入已有的测试历史，最终报告包含之前的结果
+
+        连续测试多个模型时，请求都会复用池中已预热的连接，省去重复的
+        TCP/TLS 握手和慢启动。
+        """
         self.base_url = base_url.rstrip('/')
         self.api_key = api_key
         self.headers = {
@@ -40,22 +207,140 @@ class OpenAITester:
             "Content-Type": "application/json"
         }
         self.results = {}
-        self.all_test_history = []  # 保存所有测试历史，用于最终报告
+        self.all_test_history: List[TestRecord] = []  # 保存所有测试历史，用于最终报告
+        self._counters = {"chat": 0, "stream": 0, "tools": 0, "total": 0}  # 测试历史的通过数统计
+        self._resolved_models: Dict[str, str] = {}  # 默认模型缓存，获取模型列表后重新计算
+        self._model_lower_cache: Dict[str, str] = {}  # 模型名 -> 小写模型名
+        self._model_menu: Optional[Dict[str, Any]] = None  # 模型选择菜单缓存，获取模型列表后重建
+        self._model_page = 0  # 模型选择菜单当前页
+        self._results_lock = threading.Lock()  # 并发测试时保护 self.results
+        self._history_lock = threading.Lock()  # 批量测试时保护 self.all_test_history
+        
+        # 测试历史只追加写入，每条记录单独序列化，不重写已写入的内容
+        self._log_fh = None
+        if results_log:
+            self._open_results_log(results_log, resume)
+        
+        # 复用同一个 Session，所有测试共享连接池，避免每次请求重新握手
+        self.pool_maxsize = pool_maxsize
+        self.keepalive = keepalive
+        self.connect_timeout = connect_timeout
+        self._last_response_time = time.monotonic()
+        self._session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=pool_connections,
+            pool_maxsize=pool_maxsize,
+            # 连接失败不重试: 否则地址不可达时要等 3 倍 connect_timeout 才失败
+            max_retries=Retry(total=2, connect=0, backoff_factor=0.2,
+                              status_forcelist=[429, 502, 503, 504],
+                              raise_on_status=False)
+        )
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+        self._session.headers.update(self.headers)
+    
+    def close(self) -> None:
+        """关闭 Session，释放连接池；同时将测试历史文件写入磁盘并关闭"""
+        self._session.close()
+        if self._log_fh is not None:
+            self._log_fh.flush()
+            os.fsync(self._log_fh.fileno())
+            self._log_fh.close()
+            self._log_fh = None
+    
+    def _open_results_log(self, path: str, resume: bool) -> None:
+        """打开测试历史文件 (resume 时先载入已有记录)，无法读写时只提示，不写文件继续测试"""
+        try:
+            if resume and os.path.exists(path):
+                self._load_history(path)
+            log_fh = open(path, "a+b", buffering=65536)
+        except OSError as e:
+            console.print(f"[yellow]⚠️ 无法打开测试历史文件 {path}，本次结果不会保存: {e}[/yellow]")
+            return
+        # 上次中断时可能留下写了一半的行，先补上换行，避免与新记录连在一起
+        if log_fh.seek(0, os.SEEK_END) > 0:
+            log_fh.seek(-1, os.SEEK_END)
+            if log_fh.read(1) != b"\n":
+                log_fh.write(b"\n")
+        self._log_fh = log_fh
+    
+    def _load_history(self, path: str) -> None:
+        """从 JSONL 文件载入测试历史 (跳过无法解析的行，如中断时写了一半的最后一行)"""
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = TestRecord(**json_loads(line))
+                except (ValueError, TypeError):
+                    continue
+                self._record_history(record)
+    
+    def __enter__(self) -> "OpenAITester":
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
         
+    def _store_result(self, key: str, result: Dict[str, Any]) -> None:
+        """保存单项测试结果 (可能在后台线程中调用)"""
+        with self._results_lock:
+            self.results[key] = result
+    
     def _make_request(self, method: str, endpoint: str, data: Optional[Dict] = None, 
-                      stream: bool = False, timeout: int = 30) -> requests.Response:
+                      stream: bool = False, timeout: float = 30) -> requests.Response:
         """发送 HTTP 请求"""
         url = f"{self.base_url}{endpoint}"
+        
+        # 空闲过久的连接可能已被服务端关闭，直接丢弃，避免复用失效连接
+        if time.monotonic() - self._last_response_time > self.keepalive:
+            self._session.close()
+        
+        # 连接阶段单独限时: 地址不可达时并发的各项测试很快失败，不必等满整个读取超时
+        timeout = (min(self.connect_timeout, timeout), timeout)
+        
         if method.upper() == "GET":
-            return requests.get(url, headers=self.headers, timeout=timeout)
+            response = self._session.get(url, stream=stream, timeout=timeout)
         elif method.upper() == "POST":
-            return requests.post(url, headers=self.headers, json=data, 
-                               stream=stream, timeout=timeout)
-        raise ValueError(f"不支持的 HTTP 方法: {method}")
+            # 请求体自行序列化为 bytes (Content-Type 已设置在 Session 上)，不经过 requests 内部的 json.dumps
+            body = json_dumps(data) if data is not None else None
+            response = self._session.post(url, data=body, stream=stream, timeout=timeout)
+        else:
+            raise ValueError(f"不支持的 HTTP 方法: {method}")
+        
+        # 非流式响应此时已读完；流式响应由调用方读完后再调用 _mark_response_done()
+        if not stream:
+            self._mark_response_done()
+        return response
+    
+    def _mark_response_done(self) -> None:
+        """记录最近一次响应读完的时间，连接从这时起才算空闲"""
+        self._last_response_time = time.monotonic()
+    
+    def _run_and_store(self, key: str, run: Callable[..., Dict[str, Any]], *args, **kwargs) -> Dict[str, Any]:
+        """执行一项测试并保存结果 (可在后台线程中调用，不产生任何输出)"""
+        result = run(*args, **kwargs)
+        self._store_result(key, result)
+        return result
+    
+    @staticmethod
+    def _render_error(result: Dict[str, Any], label: str) -> None:
+        """显示测试失败信息"""
+        error_type = result.get("error_type")
+        if error_type == "timeout":
+            console.print("[red]❌ 请求超时[/red]")
+        elif error_type == "connection":
+            console.print(f"[red]❌ {result['error']}[/red]")
+        elif error_type == "exception":
+            console.print(f"[red]❌ 错误: {result['error']}[/red]")
+        else:
+            console.print(f"[red]❌ {label}: {result['error']}[/red]")
     
     def test_models_list(self) -> Dict[str, Any]:
         """测试获取模型列表"""
-        console.print("\n[bold cyan]📋 测试模型列表...[/bold cyan]")
+        result = self._run_and_store("models_list", self._run_models_list)
+        self._render_models_list(result)
+        return result
+    
+    def _run_models_list(self) -> Dict[str, Any]:
         result = {
             "success": False,
             "models": [],
@@ -65,48 +350,103 @@ class OpenAITester:
         
         try:
             start_time = time.time()
-            response = self._make_request("GET", "/models")
-            result["response_time"] = round(time.time() - start_time, 3)
+            response = self._make_request("GET", "/models", stream=True)
             
             if response.status_code == 200:
-                data = response.json()
-                models = data.get("data", [])
+                result["models"] = self._parse_model_ids(response)
+                result["response_time"] = round(time.time() - start_time, 3)
                 result["success"] = True
-                result["models"] = [m.get("id", "unknown") for m in models]
-                
-                # 显示模型列表
-                if result["models"]:
-                    table = Table(title="支持的模型列表", show_header=True, header_style="bold magenta")
-                    table.add_column("序号", style="cyan", width=6)
-                    table.add_column("模型名称", style="green")
-                    
-                    for i, model in enumerate(result["models"], 1):
-                        table.add_row(str(i), model)
-                    
-                    console.print(table)
-                    console.print(f"[green]✅ 成功获取 {len(result['models'])} 个模型[/green]")
-                else:
-                    console.print("[yellow]⚠️ 模型列表为空[/yellow]")
+                self._resolved_models = {}
+                self._model_menu = None
+                self._model_page = 0
             else:
+                result["response_time"] = round(time.time() - start_time, 3)
                 result["error"] = f"HTTP {response.status_code}: {response.text[:200]}"
-                console.print(f"[red]❌ 获取模型列表失败: {result['error']}[/red]")
-                
+                result["error_type"] = _HTTP_ERROR_TYPES.get(response.status_code, "http")
+            self._mark_response_done()
+        
         except requests.exceptions.Timeout:
             result["error"] = "请求超时"
-            console.print("[red]❌ 请求超时[/red]")
+            result["error_type"] = "timeout"
         except requests.exceptions.ConnectionError as e:
             result["error"] = f"连接错误: {str(e)}"
-            console.print(f"[red]❌ 连接错误: {e}[/red]")
+            result["error_type"] = "connection"
         except Exception as e:
             result["error"] = str(e)
-            console.print(f"[red]❌ 错误: {e}[/red]")
-            
-        self.results["models_list"] = result
+            result["error_type"] = "exception"
+        
         return result
     
+    @staticmethod
+    def _parse_model_ids(response: requests.Response) -> List[str]:
+        """从 /models 响应中取出模型 ID 列表
+
+        响应较大 (或未声明长度) 且安装了 ijson 时边下载边解析，逐个处理 data 中的条目，
+        不构建完整的 JSON 对象；否则整体解析。两种方式中缺少 id 的条目都记为 "unknown"。
+        """
+        length = response.headers.get("Content-Length")
+        if ijson is not None and (length is None or int(length) > _MODELS_STREAM_PARSE_THRESHOLD):
+            response.raw.decode_content = True  # 透明解压 gzip 等编码
+            try:
+                return [m.get("id", "unknown") for m in ijson.items(response.raw, "data.item")]
+            finally:
+                response.close()
+        data = json_loads(response.content)
+        return [m.get("id", "unknown") for m in data.get("data", [])]
+    
+    def _render_models_list(self, result: Dict[str, Any]) -> None:
+        console.print("\n[bold cyan]📋 测试模型列表...[/bold cyan]")
+        if not result["success"]:
+            self._render_error(result, "获取模型列表失败")
+            return
+        
+        # 显示模型列表
+        if result["models"]:
+            table = Table(title="支持的模型列表", show_header=True, header_style="bold magenta")
+            table.add_column("序号", style="cyan", width=6)
+            table.add_column("模型名称", style="green")
+            
+            for i, model in enumerate(result["models"], 1):
+                table.add_row(str(i), model)
+            
+            console.print(table)
+            console.print(f"[green]✅ 成功获取 {len(result['models'])} 个模型[/green]")
+        else:
+            console.print("[yellow]⚠️ 模型列表为空[/yellow]")
+    
+    def _lower(self, model: str) -> str:
+        """返回模型名的小写形式 (带缓存)"""
+        lowered = self._model_lower_cache.get(model)
+        if lowered is None:
+            lowered = self._model_lower_cache[model] = model.lower()
+        return lowered
+    
+    def _resolve_model(self, kind: Literal["chat", "embed"]) -> str:
+        """返回未指定模型时使用的默认模型
+        
+        对话模型优先选择 gpt 相关模型，其次是列表中的第一个；嵌入模型选择名称含 embed 的模型。
+        结果按当前模型列表缓存，每个模型名只转一次小写。
+        """
+        if not self._resolved_models:
+            models = (self.results.get("models_list") or _EMPTY).get("models", [])
+            lowered = [(m, self._lower(m)) for m in models]
+            self._resolved_models = {
+                "chat": next((m for m, l in lowered if "gpt" in l),
+                             lowered[0][0] if lowered else "gpt-3.5-turbo"),
+                "embed": next((m for m, l in lowered if "embed" in l),
+                              "text-embedding-ada-002"),
+            }
+        return self._resolved_models[kind]
+    
     def test_chat_completion(self, model: Optional[str] = None) -> Dict[str, Any]:
         """测试基础对话功能"""
-        console.print("\n[bold cyan]💬 测试基础对话...[/bold cyan]")
+        # 如果没有指定模型，使用根据模型列表选出的默认模型
+        model = model or self._resolve_model("chat")
+        result = self._run_and_store("chat_completion", self._run_chat_completion, model)
+        self._render_chat_completion(result)
+        return result
+    
+    def _run_chat_completion(self, model: str) -> Dict[str, Any]:
         result = {
             "success": False,
             "model_used": model,
@@ -115,23 +455,6 @@ class OpenAITester:
             "response_time": 0
         }
         
-        # 如果没有指定模型，尝试使用已获取的模型列表中的第一个
-        if not model:
-            models_result = self.results.get("models_list", {})
-            if models_result.get("models"):
-                # 优先选择 gpt 相关模型
-                for m in models_result["models"]:
-                    if "gpt" in m.lower():
-                        model = m
-                        break
-                if not model:
-                    model = models_result["models"][0]
-            else:
-                model = "gpt-3.5-turbo"  # 默认模型
-        
-        result["model_used"] = model
-        console.print(f"[dim]使用模型: {model}[/dim]")
-        
         payload = {
             "model": model,
             "messages": [
@@ -146,29 +469,166 @@ class OpenAITester:
             result["response_time"] = round(time.time() - start_time, 3)
             
             if response.status_code == 200:
-                data = response.json()
-                content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
+                data = json_loads(response.content)
+                try:
+                    content = data["choices"][0]["message"]["content"] or ""
+                except (KeyError, IndexError, TypeError):
+                    content = ""
                 result["success"] = True
                 result["response"] = content
-                console.print(f"[green]✅ 对话成功[/green]")
-                console.print(Panel(content, title="AI 回复", border_style="green"))
             else:
                 result["error"] = f"HTTP {response.status_code}: {response.text[:200]}"
-                console.print(f"[red]❌ 对话失败: {result['error']}[/red]")
-                
+                result["error_type"] = _HTTP_ERROR_TYPES.get(response.status_code, "http")
+        
         except requests.exceptions.Timeout:
             result["error"] = "请求超时"
-            console.print("[red]❌ 请求超时[/red]")
+            result["error_type"] = "timeout"
         except Exception as e:
             result["error"] = str(e)
-            console.print(f"[red]❌ 错误: {e}[/red]")
-            
-        self.results["chat_completion"] = result
+            result["error_type"] = "exception"
+        
         return result
     
-    def test_stream_mode(self, model: Optional[str] = None) -> Dict[str, Any]:
+    def _render_chat_completion(self, result: Dict[str, Any]) -> None:
+        console.print("\n[bold cyan]💬 测试基础对话...[/bold cyan]")
+        console.print(f"[dim]使用模型: {result['model_used']}[/dim]")
+        if result["success"]:
+            console.print(f"[green]✅ 对话成功[/green]")
+            console.print(Panel(result["response"], title="AI 回复", border_style="green"))
+        else:
+            self._render_error(result, "对话失败")
+    
+    @staticmethod
+    def _iter_stream_chunks(response: requests.Response) -> Iterator[bytes]:
+        """逐块产出流式响应中已到达的数据
+        
+        urllib3 2.x 的 read(amt) 会等凑满 amt 字节才返回，服务端不用 chunked 编码、
+        以断开连接结束响应时，数据要到流结束才一起到达，首字节时间失真；
+        因此优先用 read1()，有数据就立即返回。旧版 urllib3 没有 read1()，
+        回退到 iter_content 的小块读取 (与 iter_lines() 默认的 512 字节一致)。
+        """
+        raw = response.raw
+        if not hasattr(raw, "read1"):
+            yield from response.iter_content(chunk_size=512)
+            return
+        while True:
+            chunk = raw.read1(16384, decode_content=True)
+            if not chunk:
+                break
+            yield chunk
+    
+    @staticmethod
+    def _iter_sse_lines(response: requests.Response):
+        """按行切分流式响应，逐个产出非空的原始字节行
+        
+        直接在 bytearray 缓冲上按换行符切分，避免 iter_lines() 逐块的字符串处理。
+        """
+        buf = bytearray()
+        for chunk in OpenAITester._iter_stream_chunks(response):
+            buf += chunk
+            while (nl := buf.find(b"\n")) != -1:
+                line = bytes(buf[:nl]).rstrip(b"\r")
+                del buf[:nl + 1]
+                if line:
+                    yield line
+        line = bytes(buf).rstrip(b"\r")
+        if line:
+            yield line
+    
+    @classmethod
+    def _iter_sse_events(cls, response: requests.Response, stats: Dict[str, Any]) -> Iterator[str]:
+        """逐个产出流式响应中的文本内容，收到 [DONE] 时结束
+        
+        只在 stats 中保留诊断所需的信息: lines (总行数)、head (前 5 行原始数据)、
+        done (是否收到 [DONE])，不缓存全部原始行。
+        """
+        for line in cls._iter_sse_lines(response):
+            stats["lines"] += 1
+            if len(stats["head"]) < 5:
+                stats["head"].append(line)
+            content = cls._process_sse_line(line)
+            if content is _SSE_DONE:
+                stats["done"] = True
+                return
+            if content:
+                yield content
+    
+    @staticmethod
+    def _extract_delta_content(data: Any) -> Optional[str]:
+        """取出流式数据块中的文本内容
+
+        优先读取标准的 choices[0].delta.content，没有时兼容直接返回 content / completion 的接口。
+        """
+        try:
+            content = data["choices"][0]["delta"]["content"]
+            if content:
+                return content
+        except (KeyError, IndexError, TypeError):
+            pass
+        if isinstance(data, dict):
+            return data.get("content") or data.get("completion")
+        return None
+    
+    @classmethod
+    def _process_sse_line(cls, line: bytes) -> Any:
+        """解析单行 SSE 数据
+        
+        Returns:
+            数据块中的文本内容 (没有内容时为 None)，遇到 [DONE] 时返回 _SSE_DONE
+        """
+        # 处理标准 SSE 格式: data: {...} (冒号后的空格可省略)
+        if line[:5] == _SSE_DATA_PREFIX:
+            data_bytes = line[6:] if line[5:6] == b" " else line[5:]
+            # JSON 数据块占绝大多数，直接解析；其余才检查是否为 [DONE]
+            if data_bytes[:1] != b"{" and data_bytes.strip() == _SSE_DONE_PAYLOAD:
+                return _SSE_DONE
+            try:
+                return cls._extract_delta_content(json_loads(data_bytes))
+            except ValueError:
+                return None
+        # 处理某些 API 直接返回 JSON 的情况
+        if line[:1] == b"{":
+            try:
+                return cls._extract_delta_content(json_loads(line))
+            except ValueError:
+                return None
+        # event: 等其他行忽略
+        return None
+    
+    def test_stream_mode(self, model: Optional[str] = None,
+                         chat_result: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """测试流式输出 - 增强版，对比流式和非流式响应"""
+        # 选择模型
+        model = model or self._resolve_model("chat")
+        
         console.print("\n[bold cyan]🌊 测试 Stream 流式输出...[/bold cyan]")
+        console.print(f"[dim]使用模型: {model}[/dim]")
+        console.print("[dim]接收流式数据: [/dim]", end="")
+        
+        # 未指定时复用之前 test_chat_completion 的结果 (需为同一模型) 做非流式对比
+        if chat_result is None:
+            chat_result = self.results.get("chat_completion")
+        
+        # 流式内容实时回显，其余结果在接收结束后统一显示
+        echo = _TokenEcho(console.file, color=console.color_system is not None)
+        result = self._run_and_store("stream_mode", self._run_stream_mode, model,
+                                     on_content=echo.add, chat_result=chat_result)
+        echo.flush()
+        console.print()  # 换行
+        
+        self._render_stream_mode(result)
+        return result
+    
+    def _run_stream_mode(self, model: str,
+                         on_content: Optional[Callable[[str, float], None]] = None,
+                         chat_result: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """执行流式测试
+        
+        Args:
+            model: 测试模型
+            on_content: 每收到一段内容时的回调 (内容, perf_counter 时间)，用于实时回显
+            chat_result: 同一轮测试中该模型的基础对话结果，未收到流式内容时用作非流式对比
+        """
         result = {
             "success": False,
             "model_used": model,
@@ -178,25 +638,12 @@ class OpenAITester:
             "response_time": 0,
             "is_real_stream": False,  # 是否真正的流式
             "first_chunk_time": 0,    # 首个数据块时间
-            "stream_quality": "unknown"  # 流式质量评估
+            "avg_interval": 0,        # 数据块平均间隔
+            "stream_quality": "unknown",  # 流式质量评估
+            "raw_preview": [],        # 未收到内容时的原始响应 (前5行)
+            "comparison": None        # 未收到内容时的非流式对比结果
         }
         
-        # 选择模型
-        if not model:
-            models_result = self.results.get("models_list", {})
-            if models_result.get("models"):
-                for m in models_result["models"]:
-                    if "gpt" in m.lower():
-                        model = m
-                        break
-                if not model:
-                    model = models_result["models"][0]
-            else:
-                model = "gpt-3.5-turbo"
-        
-        result["model_used"] = model
-        console.print(f"[dim]使用模型: {model}[/dim]")
-        
         # 测试用的消息
         test_message = "请从1数到10，每个数字单独输出"
         
@@ -209,8 +656,9 @@ class OpenAITester:
             "stream": True
         }
         
+        response = None
         try:
-            start_time = time.time()
+            start_perf = time.perf_counter()  # 单调时钟，用于计算各项时间间隔
             first_chunk_time = None
             chunk_times = []  # 记录每个数据块的时间
             response = self._make_request("POST", "/chat/completions", payload_stream, stream=True, timeout=60)
@@ -218,195 +666,199 @@ class OpenAITester:
             if response.status_code == 200:
                 full_content = ""
                 chunk_count = 0
-                raw_lines = []
-                has_done = False
+                sse_stats = {"lines": 0, "head": [], "done": False}
                 
-                console.print("[dim]接收流式数据: [/dim]", end="")
+                for content in self._iter_sse_events(response, sse_stats):
+                    # 只在收到内容时取一次时间
+                    now = time.perf_counter()
+                    elapsed = now - start_perf
+                    if first_chunk_time is None:
+                        first_chunk_time = elapsed
+                    chunk_times.append(elapsed)
+                    full_content += content
+                    chunk_count += 1
+                    if on_content:
+                        on_content(content, now)
                 
-                for line in response.iter_lines():
-                    current_time = time.time()
-                    
-                    if line:
-                        try:
-                            line_str = line.decode('utf-8')
-                        except:
-                            line_str = str(line)
-                        
-                        raw_lines.append(line_str)
-                        
-                        # 处理标准 SSE 格式: data: {...}
-                        if line_str.startswith("data: "):
-                            data_str = line_str[6:]
-                            if data_str.strip() == "[DONE]":
-                                has_done = True
-                                break
-                            try:
-                                data = json.loads(data_str)
-                                delta = data.get("choices", [{}])[0].get("delta", {})
-                                content = delta.get("content", "")
-                                if content:
-                                    if first_chunk_time is None:
-                                        first_chunk_time = current_time - start_time
-                                    chunk_times.append(current_time - start_time)
-                                    full_content += content
-                                    chunk_count += 1
-                                    console.print(f"[cyan]{content}[/cyan]", end="")
-                            except json.JSONDecodeError:
-                                pass
-                        # 处理某些 API 直接返回 JSON 的情况
-                        elif line_str.startswith("{"):
-                            try:
-                                data = json.loads(line_str)
-                                delta = data.get("choices", [{}])[0].get("delta", {})
-                                content = delta.get("content", "")
-                                if not content:
-                                    content = data.get("content", "")
-                                if not content:
-                                    content = data.get("completion", "")
-                                if content:
-                                    if first_chunk_time is None:
-                                        first_chunk_time = current_time - start_time
-                                    chunk_times.append(current_time - start_time)
-                                    full_content += content
-                                    chunk_count += 1
-                                    console.print(f"[cyan]{content}[/cyan]", end="")
-                            except json.JSONDecodeError:
-                                pass
-                        elif line_str.startswith("event:"):
-                            pass
-                
-                console.print()  # 换行
-                total_time = time.time() - start_time
+                total_time = time.perf_counter() - start_perf
                 result["response_time"] = round(total_time, 3)
+                # [DONE] 之后可能还有未读完的数据，读到结尾连接才能放回连接池复用
+                for _ in self._iter_stream_chunks(response):
+                    pass
                 result["first_chunk_time"] = round(first_chunk_time, 3) if first_chunk_time else 0
                 
                 # 分析流式质量
                 if chunk_count > 0:
                     result["chunks_received"] = chunk_count
                     result["full_response"] = full_content
+                    result["success"] = True
                     
                     # 计算数据块之间的时间间隔
                     if len(chunk_times) > 1:
                         intervals = [chunk_times[i+1] - chunk_times[i] for i in range(len(chunk_times)-1)]
                         avg_interval = sum(intervals) / len(intervals)
+                        result["avg_interval"] = round(avg_interval, 4)
                         
                         # 判断是否是真正的流式
                         # 真正的流式：数据块之间有明显的时间间隔
                         if avg_interval > 0.01 and chunk_count >= 3:  # 平均间隔 > 10ms 且至少3个块
                             result["is_real_stream"] = True
                             result["stream_quality"] = "excellent"
-                            result["success"] = True
-                            console.print(f"[green]✅ 真正的流式输出! 收到 {chunk_count} 个数据块[/green]")
-                            console.print(f"[dim]   首字节时间: {result['first_chunk_time']}s, 平均间隔: {round(avg_interval*1000, 1)}ms[/dim]")
                         elif chunk_count >= 2:
                             result["is_real_stream"] = True
                             result["stream_quality"] = "good"
-                            result["success"] = True
-                            console.print(f"[green]✅ 流式输出支持! 收到 {chunk_count} 个数据块[/green]")
                         else:
                             result["stream_quality"] = "poor"
-                            result["success"] = True
-                            console.print(f"[yellow]⚠️ 流式输出可能是伪流式 (数据块太少)[/yellow]")
                     else:
                         # 只有一个数据块
                         result["stream_quality"] = "poor"
-                        result["success"] = True
-                        console.print(f"[yellow]⚠️ 只收到 1 个数据块，可能是伪流式[/yellow]")
-                        
+                
                 elif full_content:
                     result["success"] = True
                     result["chunks_received"] = 1
                     result["full_response"] = full_content
                     result["stream_quality"] = "non-standard"
-                    console.print(f"[yellow]⚠️ 非标准流式格式[/yellow]")
                 else:
                     # 没有收到内容
                     result["success"] = False
                     
                     # 检查是否只有 [DONE]
-                    if has_done and len(raw_lines) <= 2:
+                    if sse_stats["done"] and sse_stats["lines"] <= 2:
                         result["error"] = "API 返回空流式响应 (只有 [DONE])"
                         result["stream_quality"] = "not_supported"
-                        console.print(f"[red]❌ 流式不支持: API 直接返回 [DONE]，没有实际数据[/red]")
-                        console.print(f"[yellow]   这通常意味着该模型/API 不支持真正的流式输出[/yellow]")
                     else:
                         result["error"] = "未收到有效的流式数据"
                         result["stream_quality"] = "unknown"
-                        console.print(f"[yellow]⚠️ 收到 0 个数据块[/yellow]")
-                        if raw_lines:
-                            console.print(f"[dim]原始响应 (前5行):[/dim]")
-                            for i, raw_line in enumerate(raw_lines[:5]):
-                                console.print(f"[dim]  {i+1}: {raw_line[:150]}{'...' if len(raw_line) > 150 else ''}[/dim]")
+                        result["raw_preview"] = [raw.decode('utf-8', errors='replace') for raw in sse_stats["head"]]
                     
-                    # 尝试非流式请求作为对比
-                    console.print(f"\n[dim]正在进行非流式对比测试...[/dim]")
-                    try:
-                        payload_non_stream = {
-                            "model": model,
-                            "messages": [{"role": "user", "content": "说'测试成功'"}],
-                            "max_tokens": 20,
-                            "stream": False
+                    # 非流式对比: 本轮基础对话已用同一模型测试成功时直接复用其结果；
+                    # 只收到 [DONE] 已足以说明问题，不再额外发起请求
+                    chat_result = chat_result or _EMPTY
+                    if chat_result.get("model_used") == model and chat_result.get("success"):
+                        result["comparison"] = {
+                            "source": "chat_completion",
+                            "status": "ok",
+                            "content": chat_result.get("response") or "",
+                            "response_time": chat_result["response_time"]
                         }
-                        non_stream_start = time.time()
-                        non_stream_resp = self._make_request("POST", "/chat/completions", payload_non_stream, timeout=30)
-                        non_stream_time = time.time() - non_stream_start
-                        
-                        if non_stream_resp.status_code == 200:
-                            data = non_stream_resp.json()
-                            content = data.get("choices", [{}])[0].get("message", {}).get("content", "")
-                            if content:
-                                console.print(f"[green]   非流式请求成功 ({round(non_stream_time, 2)}s): {content[:50]}[/green]")
-                                console.print(f"[yellow]   结论: API 可用，但流式模式可能不被该模型支持[/yellow]")
-                            else:
-                                console.print(f"[yellow]   非流式请求返回空内容[/yellow]")
-                        else:
-                            console.print(f"[red]   非流式请求也失败: HTTP {non_stream_resp.status_code}[/red]")
-                    except Exception as e:
-                        console.print(f"[red]   非流式对比测试失败: {e}[/red]")
-                        
+                    elif not sse_stats["done"]:
+                        result["comparison"] = self._run_non_stream_comparison(model)
+            
             else:
                 result["error"] = f"HTTP {response.status_code}: {response.text[:200]}"
-                console.print(f"[red]❌ Stream 测试失败: {result['error']}[/red]")
-                
+                result["error_type"] = _HTTP_ERROR_TYPES.get(response.status_code, "http")
+        
         except requests.exceptions.Timeout:
             result["error"] = "请求超时"
-            console.print("[red]❌ 请求超时[/red]")
+            result["error_type"] = "timeout"
         except Exception as e:
             result["error"] = str(e)
-            console.print(f"[red]❌ 错误: {e}[/red]")
-            
-        self.results["stream_mode"] = result
+            result["error_type"] = "exception"
+        finally:
+            if response is not None:
+                response.close()
+                self._mark_response_done()
+        
         return result
     
+    def _run_non_stream_comparison(self, model: str) -> Dict[str, Any]:
+        """流式测试没有收到内容时，发起一次非流式请求作为对比"""
+        comparison = {"source": "request", "status": "ok", "content": "", "response_time": 0}
+        try:
+            payload_non_stream = {
+                "model": model,
+                "messages": [{"role": "user", "content": "说'测试成功'"}],
+                "max_tokens": 20,
+                "stream": False
+            }
+            non_stream_start = time.time()
+            non_stream_resp = self._make_request("POST", "/chat/completions", payload_non_stream, timeout=30)
+            comparison["response_time"] = round(time.time() - non_stream_start, 2)
+            
+            if non_stream_resp.status_code == 200:
+                data = json_loads(non_stream_resp.content)
+                try:
+                    comparison["content"] = data["choices"][0]["message"]["content"] or ""
+                except (KeyError, IndexError, TypeError):
+                    pass
+                if not comparison["content"]:
+                    comparison["status"] = "empty"
+            else:
+                comparison["status"] = "http"
+                comparison["error"] = f"HTTP {non_stream_resp.status_code}"
+        except Exception as e:
+            comparison["status"] = "exception"
+            comparison["error"] = str(e)
+        return comparison
+    
+    def _render_stream_mode(self, result: Dict[str, Any]) -> None:
+        if result["success"]:
+            chunk_count = result["chunks_received"]
+            quality = result["stream_quality"]
+            if quality == "excellent":
+                console.print(f"[green]✅ 真正的流式输出! 收到 {chunk_count} 个数据块[/green]")
+                console.print(f"[dim]   首字节时间: {result['first_chunk_time']}s, 平均间隔: {round(result['avg_interval']*1000, 1)}ms[/dim]")
+            elif quality == "good":
+                console.print(f"[green]✅ 流式输出支持! 收到 {chunk_count} 个数据块[/green]")
+            elif quality == "non-standard":
+                console.print(f"[yellow]⚠️ 非标准流式格式[/yellow]")
+            elif chunk_count > 1:
+                console.print(f"[yellow]⚠️ 流式输出可能是伪流式 (数据块太少)[/yellow]")
+            else:
+                console.print(f"[yellow]⚠️ 只收到 1 个数据块，可能是伪流式[/yellow]")
+            return
+        
+        if result.get("error_type"):
+            self._render_error(result, "Stream 测试失败")
+            return
+        
+        if result["stream_quality"] == "not_supported":
+            console.print(f"[red]❌ 流式不支持: API 直接返回 [DONE]，没有实际数据[/red]")
+            console.print(f"[yellow]   这通常意味着该模型/API 不支持真正的流式输出[/yellow]")
+        else:
+            console.print(f"[yellow]⚠️ 收到 0 个数据块[/yellow]")
+            if result["raw_preview"]:
+                console.print(f"[dim]原始响应 (前5行):[/dim]")
+                for i, raw_line in enumerate(result["raw_preview"]):
+                    console.print(f"[dim]  {i+1}: {raw_line[:150]}{'...' if len(raw_line) > 150 else ''}[/dim]")
+        
+        comparison = result["comparison"]
+        if not comparison:
+            return
+        if comparison["source"] == "chat_completion":
+            console.print(f"\n[dim]非流式对比 (复用基础对话测试结果):[/dim]")
+        else:
+            console.print(f"\n[dim]非流式对比测试:[/dim]")
+        if comparison["status"] == "ok":
+            console.print(f"[green]   非流式请求成功 ({comparison['response_time']}s): {comparison['content'][:50]}[/green]")
+            console.print(f"[yellow]   结论: API 可用，但流式模式可能不被该模型支持[/yellow]")
+        elif comparison["status"] == "empty":
+            console.print(f"[yellow]   非流式请求返回空内容[/yellow]")
+        elif comparison["status"] == "http":
+            console.print(f"[red]   非流式请求也失败: {comparison['error']}[/red]")
+        else:
+            console.print(f"[red]   非流式对比测试失败: {comparison['error']}[/red]")
+    
     def test_function_calling(self, model: Optional[str] = None) -> Dict[str, Any]:
         """测试工具/函数调用"""
-        console.print("\n[bold cyan]🔧 测试工具调用 (Function Calling)...[/bold cyan]")
+        # 选择模型
+        model = model or self._resolve_model("chat")
+        result = self._run_and_store("function_calling", self._run_function_calling, model)
+        self._render_function_calling(result)
+        return result
+    
+    def _run_function_calling(self, model: str) -> Dict[str, Any]:
         result = {
             "success": False,
             "model_used": model,
             "tool_called": False,
             "tool_name": None,
             "tool_arguments": None,
+            "response": None,
             "error": None,
             "response_time": 0
         }
         
-        # 选择模型
-        if not model:
-            models_result = self.results.get("models_list", {})
-            if models_result.get("models"):
-                for m in models_result["models"]:
-                    if "gpt" in m.lower():
-                        model = m
-                        break
-                if not model:
-                    model = models_result["models"][0]
-            else:
-                model = "gpt-3.5-turbo"
-        
-        result["model_used"] = model
-        console.print(f"[dim]使用模型: {model}[/dim]")
-        
         # 定义一个简单的工具
         tools = [
             {
@@ -444,74 +896,79 @@ class OpenAITester:
             result["response_time"] = round(time.time() - start_time, 3)
             
             if response.status_code == 200:
-                data = response.json()
-                message = data.get("choices", [{}])[0].get("message", {})
-                tool_calls = message.get("tool_calls", [])
+                data = json_loads(response.content)
+                try:
+                    message = data["choices"][0]["message"] or _EMPTY
+                except (KeyError, IndexError, TypeError):
+                    message = _EMPTY
+                tool_calls = message.get("tool_calls")
                 
                 if tool_calls:
                     result["success"] = True
                     result["tool_called"] = True
-                    result["tool_name"] = tool_calls[0].get("function", {}).get("name")
-                    result["tool_arguments"] = tool_calls[0].get("function", {}).get("arguments")
-                    
-                    console.print(f"[green]✅ 工具调用支持![/green]")
-                    console.print(f"[dim]调用的工具: {result['tool_name']}[/dim]")
-                    console.print(f"[dim]参数: {result['tool_arguments']}[/dim]")
+                    function = tool_calls[0].get("function") or _EMPTY
+                    result["tool_name"] = function.get("name")
+                    result["tool_arguments"] = function.get("arguments")
                 else:
                     # 检查是否返回了普通回复（可能不支持工具调用）
-                    content = message.get("content", "")
+                    content = message.get("content")
                     if content:
                         result["success"] = True
                         result["tool_called"] = False
-                        console.print(f"[yellow]⚠️ 模型返回了普通回复，可能不支持工具调用[/yellow]")
-                        console.print(f"[dim]回复: {content[:100]}...[/dim]")
+                        result["response"] = content
                     else:
                         result["error"] = "未收到有效响应"
-                        console.print("[red]❌ 未收到有效响应[/red]")
+                        result["error_type"] = "invalid"
             else:
                 result["error"] = f"HTTP {response.status_code}: {response.text[:200]}"
-                console.print(f"[red]❌ 工具调用测试失败: {result['error']}[/red]")
-                
+                result["error_type"] = _HTTP_ERROR_TYPES.get(response.status_code, "http")
+        
         except requests.exceptions.Timeout:
             result["error"] = "请求超时"
-            console.print("[red]❌ 请求超时[/red]")
+            result["error_type"] = "timeout"
         except Exception as e:
             result["error"] = str(e)
-            console.print(f"[red]❌ 错误: {e}[/red]")
-            
-        self.results["function_calling"] = result
+            result["error_type"] = "exception"
+        
         return result
     
+    def _render_function_calling(self, result: Dict[str, Any]) -> None:
+        console.print("\n[bold cyan]🔧 测试工具调用 (Function Calling)...[/bold cyan]")
+        console.print(f"[dim]使用模型: {result['model_used']}[/dim]")
+        if not result["success"]:
+            self._render_error(result, "工具调用测试失败")
+        elif result["tool_called"]:
+            console.print(f"[green]✅ 工具调用支持![/green]")
+            console.print(f"[dim]调用的工具: {result['tool_name']}[/dim]")
+            console.print(f"[dim]参数: {result['tool_arguments']}[/dim]")
+        else:
+            console.print(f"[yellow]⚠️ 模型返回了普通回复，可能不支持工具调用[/yellow]")
+            console.print(f"[dim]回复: {result['response'][:100]}...[/dim]")
+    
     def test_embeddings(self, model: Optional[str] = None) -> Dict[str, Any]:
         """测试文本嵌入功能"""
-        console.print("\n[bold cyan]📊 测试 Embeddings 文本嵌入...[/bold cyan]")
+        # 选择嵌入模型
+        model = model or self._resolve_model("embed")
+        result = self._run_and_store("embeddings", self._run_embeddings, model)
+        self._render_embeddings(result)
+        return result
+    
+    def _run_embeddings(self, model: str) -> Dict[str, Any]:
         result = {
             "success": False,
             "model_used": model,
             "dimensions": 0,
+            "vectors_returned": 0,
+            "throughput_vec_per_s": 0,
             "error": None,
             "response_time": 0
         }
         
-        # 选择嵌入模型
-        if not model:
-            models_result = self.results.get("models_list", {})
-            if models_result.get("models"):
-                for m in models_result["models"]:
-                    if "embed" in m.lower():
-                        model = m
-                        break
-                if not model:
-                    model = "text-embedding-ada-002"
-            else:
-                model = "text-embedding-ada-002"
-        
-        result["model_used"] = model
-        console.print(f"[dim]使用模型: {model}[/dim]")
-        
+        # 一次请求批量嵌入多条文本，顺便测出接口吞吐量
+        inputs = [f"这是第 {i} 条测试文本" for i in range(1, 9)]
         payload = {
             "model": model,
-            "input": "这是一个测试文本"
+            "input": inputs
         }
         
         try:
@@ -520,35 +977,49 @@ class OpenAITester:
             result["response_time"] = round(time.time() - start_time, 3)
             
             if response.status_code == 200:
-                data = response.json()
-                embeddings = data.get("data", [{}])[0].get("embedding", [])
-                result["success"] = True
-                result["dimensions"] = len(embeddings)
-                console.print(f"[green]✅ Embeddings 支持! 向量维度: {result['dimensions']}[/green]")
+                data = json_loads(response.content)
+                vectors = data.get("data", [])
+                result["vectors_returned"] = len(vectors)
+                if len(vectors) == len(inputs):
+                    result["success"] = True
+                    result["dimensions"] = len(vectors[0].get("embedding", []))
+                    if result["response_time"] > 0:
+                        result["throughput_vec_per_s"] = round(len(vectors) / result["response_time"], 1)
+                else:
+                    result["error"] = f"批量请求 {len(inputs)} 条，只返回了 {len(vectors)} 个向量"
+                    result["error_type"] = "invalid"
             else:
                 result["error"] = f"HTTP {response.status_code}: {response.text[:200]}"
-                console.print(f"[red]❌ Embeddings 测试失败: {result['error']}[/red]")
-                
+                result["error_type"] = _HTTP_ERROR_TYPES.get(response.status_code, "http")
+        
         except requests.exceptions.Timeout:
             result["error"] = "请求超时"
-            console.print("[red]❌ 请求超时[/red]")
+            result["error_type"] = "timeout"
         except Exception as e:
             result["error"] = str(e)
-            console.print(f"[red]❌ 错误: {e}[/red]")
-            
-        self.results["embeddings"] = result
+            result["error_type"] = "exception"
+        
         return result
     
-    def select_model(self, show_exit_option: bool = False) -> Optional[str]:
+    def _render_embeddings(self, result: Dict[str, Any]) -> None:
+        console.print("\n[bold cyan]📊 测试 Embeddings 文本嵌入...[/bold cyan]")
+        console.print(f"[dim]使用模型: {result['model_used']}[/dim]")
+        if result["success"]:
+            console.print(f"[green]✅ Embeddings 支持! 向量维度: {result['dimensions']}[/green]")
+            console.print(f"[dim]   批量 {result['vectors_returned']} 条, 吞吐量: {result['throughput_vec_per_s']} 条/s[/dim]")
+        else:
+            self._render_error(result, "Embeddings 测试失败")
+    
+    def select_model(self, show_exit_option: bool = False) -> Union[str, List[str], None]:
         """让用户选择模型
         
         Args:
-            show_exit_option: 是否显示退出选项 (输入 0 退出)
+            show_exit_option: 是否显示退出选项 (输入 0 退出)，同时允许输入多个序号批量测试
         
         Returns:
-            选择的模型名，如果用户选择退出则返回 "__EXIT__"
+            选择的模型名；批量测试时返回模型名列表；如果用户选择退出则返回 "__EXIT__"
         """
-        models_result = self.results.get("models_list", {})
+        models_result = self.results.get("models_list") or _EMPTY
         models = models_result.get("models", [])
         
         if not models:
@@ -557,51 +1028,30 @@ class OpenAITester:
         
         console.print("\n[bold]请选择要测试的模型:[/bold]")
         if show_exit_option:
-            console.print("[dim]输入序号选择模型，输入 0 退出程序[/dim]\n")
+            console.print("[dim]输入序号选择模型，多个序号用逗号分隔可批量测试，输入 0 退出程序[/dim]\n")
         else:
             console.print("[dim]输入序号选择模型，或直接输入模型名称[/dim]\n")
         
-        # 分类显示模型
-        chat_models = []
-        embed_models = []
-        other_models = []
-        
-        for m in models:
-            m_lower = m.lower()
-            if "embed" in m_lower:
-                embed_models.append(m)
-            elif any(x in m_lower for x in ["gpt", "claude", "llama", "qwen", "glm", "chat"]):
-                chat_models.append(m)
-            else:
-                other_models.append(m)
-        
-        # 创建带分类的模型列表
-        all_models_ordered = []
-        
-        if chat_models:
-            console.print("[bold cyan]💬 对话模型:[/bold cyan]")
-            for i, m in enumerate(chat_models, 1):
-                console.print(f"  [cyan]{i}[/cyan]. {m}")
-                all_models_ordered.append(m)
-        
-        offset = len(chat_models)
-        if embed_models:
-            console.print("[bold green]📊 嵌入模型:[/bold green]")
-            for i, m in enumerate(embed_models, offset + 1):
-                console.print(f"  [green]{i}[/green]. {m}")
-                all_models_ordered.append(m)
-        
-        offset += len(embed_models)
-        if other_models:
-            console.print("[bold yellow]📦 其他模型:[/bold yellow]")
-            for i, m in enumerate(other_models, offset + 1):
-                console.print(f"  [yellow]{i}[/yellow]. {m}")
-                all_models_ordered.append(m)
-        
-        console.print()
+        # 分类后的模型列表只构建一次，循环测试时直接复用
+        if self._model_menu is None:
+            self._model_menu = self._build_model_menu(models)
+        menu = self._model_menu
+        chat_models = menu["chat_models"]
+        all_models_ordered = menu["ordered"]
+        models_lower = menu["models_lower"]
+        pages = menu["pages"]
+        self._model_page = min(self._model_page, len(pages) - 1)
+        console.print(pages[self._model_page])
         
         while True:
-            choice = console.input("[bold]请输入选择 (序号或模型名): [/bold]").strip()
+            choice = console.input(_MODEL_PROMPT).strip()
+            
+            # 模型较多时分页显示，n/p 翻页
+            if len(pages) > 1 and choice.lower() in ("n", "p"):
+                step = 1 if choice.lower() == "n" else -1
+                self._model_page = (self._model_page + step) % len(pages)
+                console.print(pages[self._model_page])
+                continue
             
             if not choice:
                 # 默认选择第一个对话模型
@@ -615,6 +1065,19 @@ class OpenAITester:
                     return selected
                 return None
             
+            # 多个序号用逗号分隔时批量测试
+            if show_exit_option and "," in choice:
+                try:
+                    indices = [int(p) for p in choice.split(",") if p.strip()]
+                except ValueError:
+                    indices = []
+                if indices and all(1 <= i <= len(all_models_ordered) for i in indices):
+                    selected = list(dict.fromkeys(all_models_ordered[i - 1] for i in indices))
+                    console.print(f"[green]✓ 已选择 {len(selected)} 个模型进行批量测试[/green]")
+                    return selected
+                console.print("[red]批量测试请输入有效的序号，用逗号分隔[/red]")
+                continue
+            
             # 尝试按序号选择
             try:
                 idx = int(choice)
@@ -635,8 +1098,11 @@ class OpenAITester:
                     console.print(f"[green]✓ 已选择模型: {choice}[/green]")
                     return choice
                 else:
-                    # 模糊匹配
-                    matches = [m for m in models if choice.lower() in m.lower()]
+                    # 模糊匹配: 前缀匹配优先，没有前缀匹配时再按子串匹配
+                    choice_lower = choice.lower()
+                    matches = [m for m, l in models_lower if l.startswith(choice_lower)]
+                    if not matches:
+                        matches = [m for m, l in models_lower if choice_lower in l]
                     if len(matches) == 1:
                         console.print(f"[green]✓ 已选择模型: {matches[0]}[/green]")
                         return matches[0]
@@ -646,13 +1112,68 @@ class OpenAITester:
                     else:
                         console.print("[red]未找到匹配的模型，请重新输入[/red]")
     
+    def _build_model_menu(self, models: List[str]) -> Dict[str, Any]:
+        """按类别构建模型选择菜单，返回各页的渲染对象、排序后的模型列表和小写索引"""
+        # 模型名小写索引，分类与模糊匹配共用
+        models_lower = [(m, self._lower(m)) for m in models]
+        
+        # 分类显示模型 (单次遍历分桶)
+        buckets = {"chat": [], "embed": [], "other": []}
+        for m, m_lower in models_lower:
+            if "embed" in m_lower:
+                buckets["embed"].append(m)
+            elif any(k in m_lower for k in _CHAT_KEYWORDS):
+                buckets["chat"].append(m)
+            else:
+                buckets["other"].append(m)
+        
+        sections = [
+            ("💬 对话模型:", "cyan", buckets["chat"]),
+            ("📊 嵌入模型:", "green", buckets["embed"]),
+            ("📦 其他模型:", "yellow", buckets["other"]),
+        ]
+        
+        # 创建带分类的模型列表，按序号连续编号
+        entries = []
+        for title, color, group in sections:
+            entries.extend((title, color, m) for m in group)
+        all_models_ordered = [m for _, _, m in entries]
+        
+        # 按页构建菜单，每页开头和类别变化处显示类别标题
+        pages = []
+        page_count = max(1, -(-len(entries) // _MODEL_PAGE_SIZE))
+        for page in range(page_count):
+            start = page * _MODEL_PAGE_SIZE
+            renderable = Text()
+            current_title = None
+            for i, (title, color, m) in enumerate(entries[start:start + _MODEL_PAGE_SIZE], start + 1):
+                if title != current_title:
+                    renderable.append(f"{title}\n", style=f"bold {color}")
+                    current_title = title
+                renderable.append("  ")
+                renderable.append(str(i), style=color)
+                renderable.append(f". {m}\n")
+            if page_count > 1:
+                renderable.append(
+                    f"第 {page + 1}/{page_count} 页，共 {len(entries)} 个模型，输入 n 下一页，p 上一页\n",
+                    style="dim"
+                )
+            pages.append(renderable)
+        
+        return {
+            "pages": pages,
+            "chat_models": buckets["chat"],
+            "ordered": all_models_ordered,
+            "models_lower": models_lower,
+        }
+    
     def select_embedding_model(self) -> Optional[str]:
         """选择嵌入模型"""
-        models_result = self.results.get("models_list", {})
+        models_result = self.results.get("models_list") or _EMPTY
         models = models_result.get("models", [])
         
         # 查找嵌入模型
-        embed_models = [m for m in models if "embed" in m.lower()]
+        embed_models = [m for m in models if "embed" in self._lower(m)]
         
         if embed_models:
             console.print(f"\n[bold]选择 Embeddings 测试模型:[/bold]")
@@ -688,51 +1209,125 @@ class OpenAITester:
     def test_single_model(self, model: str) -> Dict[str, Any]:
         """测试单个模型的所有功能"""
         console.print(f"\n[bold blue]🚀 开始使用模型 [{model}] 进行功能测试...[/bold blue]")
-        console.print("=" * 50)
+        console.write_plain(_SEP_STR)
         
         # 清空之前的测试结果（保留模型列表）
         models_list = self.results.get("models_list", {})
         self.results = {"models_list": models_list, "tested_model": model}
         
-        # 使用选定的模型进行各项测试
-        self.test_chat_completion(model=model)
-        self.test_stream_mode(model=model)
-        self.test_function_calling(model=model)
+        # 先测试基础对话: 鉴权失败、模型不存在或被限流时直接跳过后续测试
+        chat_result = self._run_and_store("chat_completion", self._run_chat_completion, model)
+        self._render_chat_completion(chat_result)
+        if self._should_skip_after_chat(chat_result):
+            console.print("[yellow]⏭️ 对话测试失败，跳过 Stream 和工具调用测试[/yellow]")
+            self._store_result("stream_mode", dict(_SKIPPED_AFTER_CHAT))
+            self._store_result("function_calling", dict(_SKIPPED_AFTER_CHAT))
+        else:
+            # 工具调用放到后台线程执行 (只做请求，不输出)；
+            # 流式测试留在主线程以保持实时输出，结束后再显示工具调用结果
+            with ThreadPoolExecutor(max_workers=1) as executor:
+                tools_future = executor.submit(self._run_and_store, "function_calling", self._run_function_calling, model)
+                self.test_stream_mode(model=model, chat_result=chat_result)
+                self._render_function_calling(tools_future.result())
         
         # 生成测试报告
         self._print_summary()
         
         # 保存到测试历史
-        self.all_test_history.append({
-            "model": model,
-            "chat": self.results.get("chat_completion", {}),
-            "stream": self.results.get("stream_mode", {}),
-            "tools": self.results.get("function_calling", {}),
-            "embeddings": self.results.get("embeddings", {})
-        })
+        self._append_history(model, self.results)
         
         return self.results
     
+    def _append_history(self, model: str, results: Dict[str, Any]) -> None:
+        """把单个模型的测试结果加入测试历史"""
+        chat = results.get("chat_completion") or _EMPTY
+        stream = results.get("stream_mode") or _EMPTY
+        tools = results.get("function_calling") or _EMPTY
+        self._record_history(TestRecord(
+            model=model,
+            chat_success=bool(chat.get("success")),
+            stream_success=bool(stream.get("success")),
+            stream_quality=stream.get("stream_quality") or "unknown",
+            tool_success=bool(tools.get("success")),
+            tool_called=bool(tools.get("tool_called")),
+        ))
+    
+    def _record_history(self, record: TestRecord) -> None:
+        """追加一条测试历史并同步更新通过数统计，指定了 results_log 时同时追加写入一行 JSON"""
+        with self._history_lock:
+            self.all_test_history.append(record)
+            counters = self._counters
+            counters["chat"] += record.chat_success
+            counters["stream"] += record.stream_success
+            counters["tools"] += record.tool_called
+            counters["total"] += 1
+            if self._log_fh is not None:
+                self._log_fh.write(json_dumps(asdict(record)) + b"\n")
+    
+    @staticmethod
+    def _should_skip_after_chat(chat_result: Dict[str, Any]) -> bool:
+        """对话测试失败的原因是否会让流式和工具调用测试同样失败"""
+        return not chat_result.get("success") and chat_result.get("error_type") in _SKIP_AFTER_CHAT_ERRORS
+    
+    def _run_model_tests_parallel(self, model: str) -> Dict[str, Dict[str, Any]]:
+        """执行单个模型的对话、流式、工具调用测试 (不产生输出)，返回 {测试项: 结果}
+        
+        对话测试先行，成功或失败原因不影响后续测试时，流式和工具调用再并发执行。
+        """
+        results = {"chat_completion": self._run_chat_completion(model)}
+        if self._should_skip_after_chat(results["chat_completion"]):
+            results["stream_mode"] = dict(_SKIPPED_AFTER_CHAT)
+            results["function_calling"] = dict(_SKIPPED_AFTER_CHAT)
+            return results
+        
+        # 流式测试直接使用本次的对话结果做非流式对比
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            futures = {
+                executor.submit(self._run_stream_mode, model,
+                                chat_result=results["chat_completion"]): "stream_mode",
+                executor.submit(self._run_function_calling, model): "function_calling",
+            }
+            for f in as_completed(futures):
+                results[futures[f]] = f.result()
+        return results
+    
+    def test_models_batch(self, models: List[str]) -> List[Dict[str, Any]]:
+        """并发批量测试多个模型
+
+        测试期间只显示进度，全部完成后按选择顺序输出每个模型的测试摘要。
+        """
+        console.print(f"\n[bold blue]🚀 开始批量测试 {len(models)} 个模型...[/bold blue]")
+        console.write_plain(_SEP_STR)
+        
+        # 每个模型最多同时发起 2 个请求，并发模型数同时受连接池大小限制
+        max_workers = max(1, min(8, len(models), self.pool_maxsize // 2))
+        models_list = self.results.get("models_list", {})
+        batch_results: Dict[int, Dict[str, Dict[str, Any]]] = {}
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self._run_model_tests_parallel, m): i for i, m in enumerate(models)}
+            for done, future in enumerate(as_completed(futures), 1):
+                i = futures[future]
+                batch_results[i] = future.result()
+                console.print(f"[dim]  ({done}/{len(models)}) {models[i]} 测试完成[/dim]")
+        
+        all_results = []
+        for i, model in enumerate(models):
+            results = {"models_list": models_list, "tested_model": model, **batch_results[i]}
+            self._print_summary(results)
+            self._append_history(model, results)
+            all_results.append(results)
+        return all_results
+    
     def _print_final_report(self):
         """打印最终对比报告"""
         if not self.all_test_history:
             return
         
-        console.print("\n")
-        console.print(Panel.fit(
+        panel = Panel.fit(
             f"[bold]📊 测试总结报告[/bold]\n[dim]共测试 {len(self.all_test_history)} 个模型[/dim]",
             border_style="blue"
-        ))
-        
-        # 流式质量描述映射
-        stream_quality_desc = {
-            "excellent": "真正流式",
-            "good": "流式支持",
-            "poor": "伪流式",
-            "non-standard": "非标准",
-            "not_supported": "不支持",
-            "unknown": "未知"
-        }
+        )
         
         # 创建对比表格
         table = Table(show_header=True, header_style="bold magenta", title="模型功能对比")
@@ -741,79 +1336,76 @@ class OpenAITester:
         table.add_column("Stream", justify="center")
         table.add_column("工具调用", justify="center")
         
-        for record in self.all_test_history:
-            model_name = record["model"]
-            # 截断过长的模型名
-            if len(model_name) > 28:
-                model_name = model_name[:25] + "..."
-            
-            # 对话状态
-            chat = record.get("chat", {})
-            chat_status = "[green]✅[/green]" if chat.get("success") else "[red]❌[/red]"
-            
-            # Stream 状态
-            stream = record.get("stream", {})
-            if stream.get("success"):
-                quality = stream.get("stream_quality", "unknown")
-                quality_text = stream_quality_desc.get(quality, quality)
-                stream_status = f"[green]✅[/green] {quality_text}"
-            else:
-                stream_status = "[red]❌[/red]"
-            
-            # 工具调用状态
-            tools = record.get("tools", {})
-            if tools.get("success"):
-                if tools.get("tool_called"):
-                    tools_status = "[green]✅ 支持[/green]"
-                else:
-                    tools_status = "[yellow]⚠️ 未调用[/yellow]"
-            else:
-                tools_status = "[red]❌[/red]"
-            
-            table.add_row(model_name, chat_status, stream_status, tools_status)
-        
-        console.print(table)
+        # 先生成全部行数据，再集中添加到表格
+        rows = [self._history_row(record) for record in self.all_test_history]
+        for row in rows:
+            table.add_row(*row)
         
         # 统计信息
-        total = len(self.all_test_history)
-        chat_pass = sum(1 for r in self.all_test_history if r.get("chat", {}).get("success"))
-        stream_pass = sum(1 for r in self.all_test_history if r.get("stream", {}).get("success"))
-        tools_pass = sum(1 for r in self.all_test_history if r.get("tools", {}).get("tool_called"))
+        counters = self._counters
+        total = counters["total"]
+        stats = Text.assemble(
+            ("\n统计:", "bold"),
+            f"\n  对话成功: {counters['chat']}/{total}",
+            f"\n  Stream 支持: {counters['stream']}/{total}",
+            f"\n  工具调用支持: {counters['tools']}/{total}"
+        )
         
-        console.print(f"\n[bold]统计:[/bold]")
-        console.print(f"  对话成功: {chat_pass}/{total}")
-        console.print(f"  Stream 支持: {stream_pass}/{total}")
-        console.print(f"  工具调用支持: {tools_pass}/{total}")
+        # 报告整体一次输出
+        console.print(Group("\n", panel, table, stats))
     
-    def run_loop_mode(self) -> None:
-        """循环测试模式 - 测试完成后返回模型列表，输入 0 退出"""
-        console.print(Panel.fit(
-            "[bold]OpenAI 公益站检测工具[/bold]\n"
-            f"[dim]API 地址: {self.base_url}[/dim]",
-            border_style="blue"
-        ))
+    @staticmethod
+    def _history_row(record: TestRecord) -> Tuple[str, str, str, str]:
+        """生成对比报告中一条测试历史对应的表格行"""
+        model_name = record.model
+        # 截断过长的模型名
+        if len(model_name) > 28:
+            model_name = model_name[:25] + "..."
+        
+        # 对话状态
+        chat_status = _OK if record.chat_success else _FAIL
+        
+        # Stream 状态
+        if record.stream_success:
+            quality = record.stream_quality
+            stream_status = _STREAM_CELL.get(quality) or f"{_OK} {quality}"
+        else:
+            stream_status = _STREAM_CELL_FAIL
+        
+        # 工具调用状态
+        if record.tool_success:
+            tools_status = _TOOL_OK if record.tool_called else _TOOL_UNCALLED
+        else:
+            tools_status = _FAIL
         
-        # 1. 首先获取模型列表
+        return model_name, chat_status, stream_status, tools_status
+    
+    def _start_session(self, interactive: bool) -> Union[str, List[str], None]:
+        """打印标题、获取模型列表并让用户选择第一个要测试的模型
+        
+        Args:
+            interactive: 是否为循环测试模式 (显示退出选项、允许批量选择)，
+                此时模型列表获取失败直接返回 "__EXIT__"
+        """
+        console.print(_header_panel(self.base_url))
         self.test_models_list()
         
-        if not self.results.get("models_list", {}).get("success"):
+        if interactive and not (self.results.get("models_list") or _EMPTY).get("success"):
             console.print("[red]无法获取模型列表，请检查 API 地址和 Key[/red]")
-            return
+            return "__EXIT__"
+        return self.select_model(show_exit_option=interactive)
+    
+    def run_loop_mode(self) -> None:
+        """循环测试模式 - 测试完成后返回模型列表，输入 0 退出"""
+        # 1. 获取模型列表并选择模型（显示退出选项）
+        selected_model = self._start_session(interactive=True)
         
         # 2. 循环测试
-        test_count = 0
         while True:
-            test_count += 1
-            
-            if test_count > 1:
-                console.print("\n" + "=" * 50)
-                console.print("[bold cyan]📋 返回模型列表[/bold cyan]")
-            
-            # 让用户选择模型（显示退出选项）
-            selected_model = self.select_model(show_exit_option=True)
-            
             # 检查是否退出
             if selected_model == "__EXIT__":
+                # 不再发起请求，先释放连接池
+                self.close()
                 # 打印最终对比报告
                 if self.all_test_history:
                     self._print_final_report()
@@ -824,40 +1416,40 @@ class OpenAITester:
                 console.print("[yellow]⚠️ 未选择模型，将使用默认模型 gpt-3.5-turbo[/yellow]")
                 selected_model = "gpt-3.5-turbo"
             
-            # 测试选定的模型
-            self.test_single_model(selected_model)
+            # 测试选定的模型 (多个模型时批量并发测试)
+            if isinstance(selected_model, list):
+                self.test_models_batch(selected_model)
+            else:
+                self.test_single_model(selected_model)
             
             console.print("\n[bold green]✅ 本轮测试完成![/bold green]")
+            
+            # 返回模型列表，继续选择
+            console.write_plain("\n" + _SEP_STR)
+            console.print(_MODEL_LIST_TITLE)
+            selected_model = self.select_model(show_exit_option=True)
     
     def run_all_tests(self) -> Dict[str, Any]:
         """运行所有测试（单次模式，兼容旧接口）"""
-        console.print(Panel.fit(
-            "[bold]OpenAI 公益站检测工具[/bold]\n"
-            f"[dim]API 地址: {self.base_url}[/dim]",
-            border_style="blue"
-        ))
-        
-        # 1. 首先获取模型列表
-        self.test_models_list()
-        
-        # 2. 让用户选择模型
-        selected_model = self.select_model()
+        # 1. 获取模型列表并让用户选择模型
+        selected_model = self._start_session(interactive=False)
         
         if not selected_model:
             console.print("[yellow]⚠️ 未选择模型，将使用默认模型 gpt-3.5-turbo[/yellow]")
             selected_model = "gpt-3.5-turbo"
         
-        # 3. 测试选定的模型
+        # 2. 测试选定的模型
         self.test_single_model(selected_model)
         
         return self.results
     
-    def _print_summary(self):
-        """打印测试摘要"""
-        tested_model = self.results.get("tested_model", "未知")
+    def _print_summary(self, results: Optional[Dict[str, Any]] = None):
+        """打印测试摘要 (默认为当前测试结果 self.results)"""
+        if results is None:
+            results = self.results
+        tested_model = results.get("tested_model", "未知")
         
-        console.print("\n")
-        console.print(Panel.fit(f"[bold]📊 测试结果摘要[/bold]\n[dim]测试模型: {tested_model}[/dim]", border_style="blue"))
+        panel = Panel.fit(f"[bold]📊 测试结果摘要[/bold]\n[dim]测试模型: {tested_model}[/dim]", border_style="blue")
         
         table = Table(show_header=True, header_style="bold magenta")
         table.add_column("测试项目", style="cyan")
@@ -865,20 +1457,10 @@ class OpenAITester:
         table.add_column("响应时间", justify="right")
         table.add_column("备注")
         
-        # 流式质量描述映射
-        stream_quality_desc = {
-            "excellent": "真正流式",
-            "good": "流式支持",
-            "poor": "伪流式",
-            "non-standard": "非标准格式",
-            "not_supported": "不支持",
-            "unknown": "未知"
-        }
-        
         def get_stream_note(r):
             chunks = r.get('chunks_received', 0)
             quality = r.get('stream_quality', 'unknown')
-            quality_text = stream_quality_desc.get(quality, quality)
+            quality_text = _STREAM_QUALITY_DESC.get(quality, quality)
             if chunks > 0:
                 return f"{chunks} 块 ({quality_text})"
             return quality_text
@@ -891,59 +1473,59 @@ class OpenAITester:
         ]
         
         for name, key, note_func in test_items:
-            result = self.results.get(key, {})
+            result = results.get(key) or _EMPTY
             # 处理跳过的测试
             if result.get("skipped"):
                 status = "[yellow]⏭️ 跳过[/yellow]"
-                note = "用户跳过"
+                note = "对话失败" if result.get("reason") == "chat_failed" else "用户跳过"
             elif result.get("success"):
                 status = "[green]✅ 通过[/green]"
                 note = note_func(result)
             else:
                 status = "[red]❌ 失败[/red]"
-                error = result.get("error", "")
-                note = (error[:30] + "...") if error and len(error) > 30 else error
+                note = _short(result.get("error") or "")
             response_time = f"{result.get('response_time', 0)}s"
             table.add_row(name, status, response_time, note or "-")
         
-        console.print(table)
-        
         # 统计（过滤掉非字典类型的值，如 tested_model）
-        test_results = [r for r in self.results.values() if isinstance(r, dict)]
+        test_results = [r for r in results.values() if isinstance(r, dict)]
         passed = sum(1 for r in test_results if r.get("success"))
         total = len(test_results)
-        console.print(f"\n[bold]总计: {passed}/{total} 项测试通过[/bold]")
+        
+        # 摘要整体一次输出
+        console.print(Group(
+            "\n",
+            panel,
+            table,
+            Text.assemble("\n", (f"总计: {passed}/{total} 项测试通过", "bold"))
+        ))
 
 
 def main():
     """主函数"""
-    console.print(Panel.fit(
-        "[bold blue]🔍 OpenAI 公益站检测工具[/bold blue]\n"
-        "[dim]测试 OpenAI 兼容接口的各种功能[/dim]",
-        border_style="blue"
-    ))
+    console.print(_WELCOME_PANEL)
     
     # 获取用户输入
     console.print("\n[bold]请输入 API 信息:[/bold]")
     
-    base_url = console.input("[cyan]API Base URL[/cyan] (如 https://api.openai.com/v1): ").strip()
+    base_url = console.input(_URL_PROMPT).strip()
     if not base_url:
         console.print("[red]错误: API Base URL 不能为空[/red]")
         return
     
-    api_key = console.input("[cyan]API Key[/cyan]: ").strip()
+    api_key = console.input(_KEY_PROMPT).strip()
     if not api_key:
         console.print("[red]错误: API Key 不能为空[/red]")
         return
     
-    # 创建测试器并运行循环测试模式
-    tester = OpenAITester(base_url, api_key)
-    
-    console.print("\n[bold yellow]开始测试...[/bold yellow]")
-    console.print("=" * 50)
-    
-    # 使用循环测试模式
-    tester.run_loop_mode()
+    # 创建测试器并运行循环测试模式 (测试历史追加写入 results.jsonl，--resume 时先载入已有记录)
+    resume = "--resume" in sys.argv[1:]
+    with OpenAITester(base_url, api_key, results_log="results.jsonl", resume=resume) as tester:
+        console.print("\n[bold yellow]开始测试...[/bold yellow]")
+        console.write_plain(_SEP_STR)
+        
+        # 使用循环测试模式
+        tester.run_loop_mode()
 
 
 if __name__ == "__main__":